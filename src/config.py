@@ -1,15 +1,67 @@
+import importlib
+import json
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Any, Dict
-import yaml
+from typing import Optional, Any, Dict, Tuple
 from dotenv import load_dotenv
 
 load_dotenv(dotenv_path=Path(".env") if Path(".env").exists() else None)
 
-def _yaml_params() -> Dict[str, Any]:
-    with open("params.yaml", "r") as f:
-        return yaml.safe_load(f) or {}
+_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+
+def _load_yaml(path: str) -> Dict[str, Any]:
+    # PyYAML is only imported when the JSON sidecar is missing or stale.
+    yaml = importlib.import_module("yaml")
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=loader) or {}
+
+def _params_cached(path: str) -> Dict[str, Any]:
+    sidecar = f"{path}.json"
+    st = os.stat(path)
+    # The sidecar records the (mtime_ns, size) it was built from; only an exact match is current.
+    source = [st.st_mtime_ns, st.st_size]
+    try:
+        with open(sidecar, "r") as f:
+            cached = json.load(f)
+        if cached.get("source") == source:
+            return cached["params"]
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+
+    params = _load_yaml(path)
+    tmp = f"{sidecar}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump({"source": source, "params": params}, f)
+        os.replace(tmp, sidecar)
+    except (OSError, TypeError):
+        # Read-only checkout or non-JSON values: keep serving from YAML.
+        Path(tmp).unlink(missing_ok=True)
+    return params
+
+def _yaml_params(path: str = "params.yaml") -> Dict[str, Any]:
+    st = os.stat(path)
+    key = (path, st.st_mtime_ns, st.st_size)
+    if key in _CACHE:
+        return _CACHE[key]
+    params = _params_cached(path)
+    _CACHE.clear()
+    _CACHE[key] = params
+    return params
+
+def cpu_limit() -> int:
+    # CPUs actually usable here: affinity mask, capped by the cgroup v2 quota (containers)
+    n = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            n = min(n, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return n
 
 def _get_env(key: str) -> Optional[str]:
     v = os.getenv(key)
@@ -45,6 +97,7 @@ class PromotionGates:
 class APIConfig:
     reload_url: Optional[str]
     reload_token: Optional[str]
+    model_cache_dir: str
 
 @dataclass(frozen=True)
 class AppConfig:
@@ -55,6 +108,7 @@ class AppConfig:
     gates: PromotionGates
     api: APIConfig
 
+@lru_cache(maxsize=1)
 def load_config() -> AppConfig:
     p = _yaml_params()
 
@@ -74,6 +128,7 @@ def load_config() -> AppConfig:
 
     reload_url = _get_env("MODEL_API_RELOAD_URL")
     reload_token = _get_env("MODEL_API_TOKEN")
+    model_cache_dir = _get_env("MODEL_CACHE_DIR") or "/var/cache/models"
 
     return AppConfig(
         data=DataConfig(url=data_url),
@@ -86,5 +141,5 @@ def load_config() -> AppConfig:
             production_alias=production_alias,
         ),
         gates=PromotionGates(min_f1=min_f1, min_accuracy=min_accuracy),
-        api=APIConfig(reload_url=reload_url, reload_token=reload_token),
+        api=APIConfig(reload_url=reload_url, reload_token=reload_token, model_cache_dir=model_cache_dir),
     )
@@ -0,0 +1,24 @@
+from pathlib import Path
+from typing import Union
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow is optional; fall back to pandas' own reader/writer
+    pa = None
+    pa_csv = None
+
+PathLike = Union[str, Path]
+
+def read_csv(path: PathLike) -> pd.DataFrame:
+    if pa_csv is None:
+        return pd.read_csv(path)
+    tbl = pa_csv.read_csv(str(path), read_options=pa_csv.ReadOptions(block_size=8 << 20))
+    return tbl.to_pandas(split_blocks=True, self_destruct=True)
+
+def write_csv(df: pd.DataFrame, path: PathLike) -> None:
+    if pa_csv is None:
+        df.to_csv(path, index=False, chunksize=100_000, lineterminator="\n")
+        return
+    pa_csv.write_csv(pa.Table.from_pandas(df, preserve_index=False), str(path))
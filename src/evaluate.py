@@ -1,10 +1,10 @@
 import json
 from pathlib import Path
-import pandas as pd
 from joblib import load
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, roc_auc_score
 import mlflow
 from src.config import load_config
+from src.csv_io import read_csv
 from src.logger import get_logger
 
 logger = get_logger("evaluate")
@@ -17,13 +17,13 @@ def main():
     if not test_path.exists() or not model_path.exists():
         raise FileNotFoundError("Missing test data or model. Run train/evaluate via dvc repro.")
 
-    df = pd.read_csv(test_path)
+    df = read_csv(test_path)
     X_test = df.drop(columns=["target"])
     y_test = df["target"]
 
+    # No mmap_mode: sklearn's Tree.__setstate__ copies node/value buffers, so mmap saves no RSS for forests
     clf = load(model_path)
-    probas = clf.predict_proba(X_test)
-    y_pred = probas.argmax(axis=1)
+    y_pred = clf.predict(X_test)
 
     acc = accuracy_score(y_test, y_pred)
     precision, recall, f1, _ = precision_recall_fscore_support(y_test, y_pred, average="macro")
@@ -36,6 +36,7 @@ def main():
     }
 
     try:
+        probas = clf.predict_proba(X_test)
         auc = roc_auc_score(y_test, probas, multi_class="ovr", average="macro")
         metrics["roc_auc_macro"] = float(auc)
     except Exception:
@@ -1,10 +1,64 @@
-import requests
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Optional
+import requests
 from src.config import load_config
 from src.logger import get_logger
 
 logger = get_logger("get_data")
 
+COPY_BUFFER = 1 << 20
+PARALLEL_MIN_BYTES = 16 << 20
+# Byte ranges must match Content-Length, so ask for the unencoded body
+IDENTITY = {"Accept-Encoding": "identity"}
+
+def _ranged_size(url: str) -> Optional[int]:
+    try:
+        resp = requests.head(url, headers=IDENTITY, allow_redirects=True, timeout=60)
+        resp.raise_for_status()
+    except requests.RequestException:
+        return None
+    if resp.headers.get("Accept-Ranges", "").lower() != "bytes":
+        return None
+    size = int(resp.headers.get("Content-Length") or 0)
+    return size if size > PARALLEL_MIN_BYTES else None
+
+def _fetch_range(url: str, fd: int, start: int, end: int) -> None:
+    headers = {**IDENTITY, "Range": f"bytes={start}-{end}"}
+    with requests.get(url, headers=headers, stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        if resp.status_code != 206:
+            raise RuntimeError(f"Server ignored Range request (status={resp.status_code})")
+        offset = start
+        for chunk in resp.iter_content(chunk_size=COPY_BUFFER):
+            os.pwrite(fd, chunk, offset)
+            offset += len(chunk)
+    if offset != end + 1:
+        raise RuntimeError(f"Short read for bytes {start}-{end}: got {offset - start}")
+
+def _download_parallel(url: str, out_path: Path, size: int) -> None:
+    n = min(8, os.cpu_count() or 1)
+    step = -(-size // n)
+    fd = os.open(out_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            futures = [pool.submit(_fetch_range, url, fd, start, min(start + step, size) - 1)
+                       for start in range(0, size, step)]
+            for fut in futures:
+                fut.result()
+    finally:
+        os.close(fd)
+
+def _download_stream(url: str, out_path: Path) -> None:
+    with requests.get(url, stream=True, timeout=60) as resp:
+        resp.raise_for_status()
+        resp.raw.decode_content = True
+        with open(out_path, "wb") as f:
+            shutil.copyfileobj(resp.raw, f, length=COPY_BUFFER)
+
 def main():
     cfg = load_config()
     url = cfg.data.url
@@ -12,12 +66,19 @@ def main():
     out_path = Path("data/raw.csv")
 
     logger.info(f"Downloading dataset from {url} -> {out_path}")
-    resp = requests.get(url, stream=True, timeout=60)
-    resp.raise_for_status()
-    with open(out_path, "wb") as f:
-        for chunk in resp.iter_content(chunk_size=8192):
-            if chunk:
-                f.write(chunk)
+    # Download beside the target and rename only once complete, so a failed or partial
+    # (zero-filled, for ranged downloads) file never sits at data/raw.csv
+    part_path = out_path.with_name(f"{out_path.name}.{os.getpid()}.part")
+    size = _ranged_size(url) if hasattr(os, "pwrite") else None
+    try:
+        if size:
+            logger.info(f"Using parallel ranged download ({size} bytes)")
+            _download_parallel(url, part_path, size)
+        else:
+            _download_stream(url, part_path)
+        os.replace(part_path, out_path)
+    finally:
+        part_path.unlink(missing_ok=True)
     logger.info(f"Downloaded {out_path.resolve()} ({out_path.stat().st_size} bytes)")
 
 if __name__ == "__main__":
@@ -1,29 +1,63 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 import sys
+import time
 
 LOG_DIR = Path("logs")
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 LOG_FILE = LOG_DIR / "app.log"
 
-def get_logger(name: str = "app"):
-    logger = logging.getLogger(name)
-    if logger.handlers:
-        return logger
-    logger.setLevel(logging.INFO)
+# Loggers only enqueue records; one listener thread does the stream/file I/O.
+_Q: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+
+class _CachedTimeFormatter(logging.Formatter):
+    # strftime/localtime once per second instead of once per record.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._last_sec = -1
+        self._last_str = ""
+
+    def formatTime(self, record, datefmt=None):
+        sec = int(record.created)
+        if sec != self._last_sec:
+            ct = self.converter(sec)
+            self._last_str = time.strftime(datefmt or self.default_time_format, ct)
+            self._last_sec = sec
+        if datefmt:
+            return self._last_str
+        return self.default_msec_format % (self._last_str, record.msecs)
 
+def _start_listener() -> QueueListener:
     ch = logging.StreamHandler(sys.stdout)
     ch.setLevel(logging.INFO)
-    ch.setFormatter(logging.Formatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s"))
+    ch.setFormatter(_CachedTimeFormatter("[%(asctime)s] %(levelname)s %(name)s: %(message)s"))
 
-    fh = RotatingFileHandler(LOG_FILE, maxBytes=5_000_000, backupCount=3)
-    fh.setLevel(logging.INFO)
-    fh.setFormatter(logging.Formatter(
-        "%(asctime)s\t%(levelname)s\t%(name)s\t%(filename)s:%(lineno)d\t%(message)s"
-    ))
+    handlers = [ch]
+    # LOG_TO_FILE=0 keeps multi-process servers off the shared rotating file (rotation isn't process-safe)
+    if os.environ.get("LOG_TO_FILE", "1") != "0":
+        fh = RotatingFileHandler(LOG_FILE, maxBytes=5_000_000, backupCount=3)
+        fh.setLevel(logging.INFO)
+        fh.setFormatter(_CachedTimeFormatter(
+            "%(asctime)s\t%(levelname)s\t%(name)s\t%(filename)s:%(lineno)d\t%(message)s"
+        ))
+        handlers.append(fh)
 
-    logger.addHandler(ch)
-    logger.addHandler(fh)
+    listener = QueueListener(_Q, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+_LISTENER = _start_listener()
+
+def get_logger(name: str = "app"):
+    logger = logging.getLogger(name)
+    if logger.handlers:
+        return logger
+    logger.setLevel(logging.INFO)
+    logger.addHandler(QueueHandler(_Q))
     logger.propagate = False
     return logger
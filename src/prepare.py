@@ -1,7 +1,7 @@
 from pathlib import Path
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from src.config import load_config
+from src.csv_io import read_csv, write_csv
 from src.logger import get_logger
 
 logger = get_logger("prepare")
@@ -14,7 +14,7 @@ def main():
     if not raw_path.exists():
         raise FileNotFoundError("data/raw.csv not found. Run get_data first (dvc repro).")
 
-    df = pd.read_csv(raw_path)
+    df = read_csv(raw_path)
 
     # Normalize target column -> 'target' (Iris has 'species')
     if "species" in df.columns:
@@ -32,12 +32,14 @@ def main():
         stratify=y
     )
 
-    train = pd.concat([X_train.reset_index(drop=True), y_train.reset_index(drop=True)], axis=1)
-    test = pd.concat([X_test.reset_index(drop=True), y_test.reset_index(drop=True)], axis=1)
+    # Attach target as a raw array: no index alignment and no concat copy
+    train = X_train.copy()
+    train["target"] = y_train.to_numpy()
+    test = X_test.copy()
+    test["target"] = y_test.to_numpy()
 
-
-    train.to_csv("data/train.csv", index=False)
-    test.to_csv("data/test.csv", index=False)
+    write_csv(train, "data/train.csv")
+    write_csv(test, "data/test.csv")
 
     logger.info(f"Prepared train={train.shape}, test={test.shape}")
 
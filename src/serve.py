@@ -1,16 +1,35 @@
-from typing import List, Dict, Any
-import time, uuid
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio, os, threading, time, uuid, warnings
 from fastapi import FastAPI, HTTPException, Request, status
-from pydantic import BaseModel
-import mlflow
-import mlflow.pyfunc
-from src.config import load_config
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing_extensions import TypedDict
+from src.config import cpu_limit, load_config
 from src.logger import get_logger
 
+# The estimator was fitted on a DataFrame; ndarray inputs are already in signature order.
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
 logger = get_logger("serve")
 cfg = load_config()
-app = FastAPI(title="Inference Service", version="1.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global _batch_queue, _batch_task
+    # Warm the model off the event loop so /healthz is live immediately
+    threading.Thread(target=_get_model, name="model-warmup", daemon=True).start()
+    _batch_queue = asyncio.Queue()
+    _batch_task = asyncio.create_task(_batch_consumer())
+    try:
+        yield
+    finally:
+        _batch_task.cancel()
+
+app = FastAPI(title="Inference Service", version="1.1.0", lifespan=lifespan)
 
 class PredictRequest(BaseModel):
     records: List[Dict[str, Any]]
@@ -18,12 +37,19 @@ class PredictRequest(BaseModel):
 class PredictResponse(BaseModel):
     predictions: List[Any]
 
+# /predict bodies are validated straight from JSON bytes by pydantic-core. Once a model is
+# loaded, records are typed per feature instead of Dict[str, Any].
+_GENERIC_REQUEST = TypeAdapter(TypedDict("PredictBody", {"records": List[Dict[str, Any]]}))
+_SCHEMA_TYPES = {"double": float, "float": float, "long": int, "integer": int, "boolean": bool, "string": str}
+_SCHEMA_DTYPES = {"double": "float64", "float": "float32", "long": "int64", "integer": "int32",
+                  "boolean": "bool", "string": "object"}
+
 @app.middleware("http")
 async def request_timing(request: Request, call_next):
     rid = request.headers.get("x-request-id", str(uuid.uuid4()))
-    start = time.time()
+    start = time.perf_counter_ns()
     resp = await call_next(request)
-    ms = (time.time() - start) * 1000.0
+    ms = (time.perf_counter_ns() - start) / 1e6
     logger.info(f"rid={rid} {request.method} {request.url.path} status={resp.status_code} ms={ms:.2f}")
     resp.headers["x-request-id"] = rid
     return resp
@@ -32,34 +58,287 @@ async def request_timing(request: Request, call_next):
 def healthz():
     return {"status": "ok"}
 
+def _unwrap_sklearn(model):
+    return getattr(getattr(model, "_model_impl", None), "sklearn_model", None)
+
+def _cache_dump(sk, cache: Path) -> None:
+    from joblib import dump
+    try:
+        cache.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_suffix(f".{os.getpid()}.tmp")
+        dump(sk, tmp, compress=0)
+        os.replace(tmp, cache)
+        logger.info(f"Cached estimator at {cache}")
+    except Exception as e:
+        logger.warning(f"Could not write model cache {cache}: {e}")
+
 def load_production_model():
+    # Heavy ML stack is imported lazily so the port binds before it is loaded.
+    import mlflow
+    import mlflow.pyfunc
+    from mlflow.tracking import MlflowClient
     mlflow.set_tracking_uri(cfg.mlflow.tracking_uri)
-    uri = f"models:/{cfg.mlflow.model_name}@{cfg.mlflow.production_alias}"
-    logger.info(f"Loading model: {uri}")
-    return mlflow.pyfunc.load_model(uri)
-
-MODEL = None
-try:
-    MODEL = load_production_model()
-except Exception as e:
-    logger.error(f"Initial model load failed: {e}")
-
-@app.post("/predict", response_model=PredictResponse, status_code=status.HTTP_200_OK)
-def predict(req: PredictRequest):
-    global MODEL
-    if MODEL is None:
+    name = cfg.mlflow.model_name
+    version = MlflowClient().get_model_version_by_alias(name=name, alias=cfg.mlflow.production_alias).version
+
+    # Estimators are immutable per registry version, so (name, version) is a safe cache key.
+    # A hit skips the MLflow artifact fetch and pyfunc wrapping; the trees are still deserialized
+    # (sklearn copies tree buffers on unpickle, so mmap_mode would not help).
+    cache = Path(cfg.api.model_cache_dir) / f"{name}-{version}.joblib"
+    if cache.exists():
+        from joblib import load
+        try:
+            logger.info(f"Loading model from cache: {cache}")
+            return load(cache)
+        except Exception as e:
+            logger.warning(f"Model cache {cache} unreadable, falling back to MLflow: {e}")
+
+    uri = f"models:/{name}/{version}"
+    logger.info(f"Loading model: {uri} (alias '{cfg.mlflow.production_alias}')")
+    model = mlflow.pyfunc.load_model(uri)
+    sk = _unwrap_sklearn(model)
+    # Only estimators eligible for the ndarray path are cached: a cache hit has no signature to fall back on
+    if sk is not None and _numeric_signature(_feature_order(model), _signature_types(model)):
+        _cache_dump(sk, cache)
+    return model
+
+@dataclass(frozen=True)
+class ServingState:
+    # Everything /predict needs for one model, swapped in a single assignment on (re)load
+    model: Any
+    sk_model: Any = None
+    feature_order: Optional[Tuple[str, ...]] = None
+    feature_types: Dict[str, str] = field(default_factory=dict)
+    sk_dtype: str = "float64"
+    request_adapter: TypeAdapter = _GENERIC_REQUEST
+
+STATE: Optional[ServingState] = None
+_model_lock = threading.Lock()
+# After a failed load, /predict returns 503 without retrying until the backoff elapses
+LOAD_RETRY_BACKOFF_S = 30.0
+_last_load_failure: Optional[float] = None
+
+def _feature_order(model) -> Optional[Tuple[str, ...]]:
+    if hasattr(model, "feature_names_in_"):
+        return tuple(model.feature_names_in_)
+    try:
+        schema = model.metadata.get_input_schema()
+        names = tuple(schema.input_names()) if schema is not None and schema.has_input_names() else ()
+        return names or None
+    except Exception:
+        return None
+
+def _signature_types(model) -> Dict[str, str]:
+    # MLflow input type names ("double", "long", "string", ...) keyed by column
+    try:
+        return {spec.name: getattr(spec.type, "name", str(spec.type)) for spec in model.metadata.get_input_schema().inputs}
+    except Exception:
+        return {}
+
+_NUMERIC_TYPES = {"double", "float", "long", "integer"}
+
+def _numeric_signature(columns: Optional[Tuple[str, ...]], types: Dict[str, str]) -> bool:
+    return bool(columns) and all(types.get(c) in _NUMERIC_TYPES for c in columns)
+
+def _field_type(declared: Optional[str], numeric_path: bool):
+    # Declared but unmapped types (datetime, binary, ...) are passed through for MLflow to enforce.
+    # Untyped columns (cache hit) are only coerced to float when they feed the ndarray path.
+    if declared is None:
+        return float if numeric_path else Any
+    return _SCHEMA_TYPES.get(declared, Any)
+
+def _request_adapter(columns: Optional[Tuple[str, ...]], types: Dict[str, str], numeric_path: bool) -> TypeAdapter:
+    if not columns:
+        return _GENERIC_REQUEST
+    record = TypedDict("FeatureRecord", {c: _field_type(types.get(c), numeric_path) for c in columns})
+    return TypeAdapter(TypedDict("PredictBody", {"records": List[record]}))
+
+def _is_tree_model(sk) -> bool:
+    # sklearn trees/forests/GBMs cast X to float32 before traversal, so float32 inputs skip that
+    # copy without changing predictions. Other ensembles (voting, bagging, stacking) stay float64.
+    if sk is None:
+        return False
+    try:
+        from sklearn.ensemble._forest import BaseForest
+        from sklearn.ensemble._gb import BaseGradientBoosting
+        from sklearn.tree._classes import BaseDecisionTree
+    except ImportError:
+        return False
+    return isinstance(sk, (BaseForest, BaseDecisionTree, BaseGradientBoosting))
+
+def _set_model(model):
+    global STATE
+    # Bypass pyfunc schema enforcement for sklearn flavors with all-numeric inputs; keep pyfunc otherwise.
+    # A joblib cache hit hands us the bare estimator, and only numeric-input estimators are cached.
+    cached = hasattr(model, "feature_names_in_")
+    sk = model if cached else _unwrap_sklearn(model)
+    columns = _feature_order(model)
+    types = _signature_types(model)
+    numeric = bool(columns) if cached else _numeric_signature(columns, types)
+    sk = sk if sk is not None and numeric else None
+    if getattr(sk, "n_jobs", None) not in (None, 1):
+        # One joblib pool per request per worker would oversubscribe the CPUs
+        sk.n_jobs = 1
+    STATE = ServingState(
+        model=model,
+        sk_model=sk,
+        feature_order=columns,
+        feature_types=types,
+        sk_dtype="float32" if _is_tree_model(sk) else "float64",
+        request_adapter=_request_adapter(columns, types, sk is not None),
+    )
+    logger.info(f"Predict path: {'sklearn (ndarray)' if sk is not None else 'pyfunc'}")
+
+def _in_backoff() -> bool:
+    return _last_load_failure is not None and time.monotonic() - _last_load_failure < LOAD_RETRY_BACKOFF_S
+
+def _get_model() -> Optional[ServingState]:
+    global _last_load_failure
+    if STATE is None and not _in_backoff():
+        with _model_lock:
+            if STATE is None and not _in_backoff():
+                try:
+                    _set_model(load_production_model())
+                    _last_load_failure = None
+                except Exception as e:
+                    _last_load_failure = time.monotonic()
+                    logger.error(f"Model load failed (retry in {LOAD_RETRY_BACKOFF_S:.0f}s): {e}")
+    return STATE
+
+def _to_array(records: List[Dict[str, Any]], columns: Tuple[str, ...], dtype: str = "float64"):
+    import numpy as np
+    n, k = len(records), len(columns)
+    return np.fromiter((r[c] for r in records for c in columns), dtype=dtype, count=n * k).reshape(n, k)
+
+def _to_frame(records: List[Dict[str, Any]], columns: Optional[Tuple[str, ...]], types: Dict[str, str]):
+    import numpy as np
+    import pandas as pd
+    if not columns:
+        return pd.DataFrame.from_records(records)
+    # One column per signature input, in its declared dtype, so pyfunc schema enforcement accepts it
+    return pd.DataFrame({c: np.array([r[c] for r in records], dtype=_SCHEMA_DTYPES.get(types.get(c)))
+                         for c in columns})
+
+# Microbatching: concurrent /predict calls that arrive within BATCH_WINDOW_S share one sk.predict
+BATCH_WINDOW_S = 0.002
+BATCH_MAX_ROWS = 4096
+_batch_queue: Optional[asyncio.Queue] = None
+_batch_task: Optional[asyncio.Task] = None
+_predict_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+
+async def _run_batch(loop, items) -> None:
+    import numpy as np
+    sk = items[0][1]
+    try:
+        stacked = np.vstack([arr for _, _, arr in items])
+        preds = await loop.run_in_executor(_predict_pool, sk.predict, stacked)
+    except Exception as e:
+        if len(items) == 1:
+            if not items[0][0].done():
+                items[0][0].set_exception(e)
+            return
+        # One bad request must not fail the others it was coalesced with: retry each on its own
+        for fut, _, arr in items:
+            if fut.done():
+                continue
+            try:
+                fut.set_result(await loop.run_in_executor(_predict_pool, sk.predict, arr))
+            except Exception as item_error:
+                if not fut.done():
+                    fut.set_exception(item_error)
+        return
+    offset = 0
+    for fut, _, arr in items:
+        n = len(arr)
+        if not fut.done():
+            fut.set_result(preds[offset:offset + n])
+        offset += n
+
+async def _batch_consumer() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _batch_queue.get()]
+        rows = len(batch[0][2])
+        deadline = loop.time() + BATCH_WINDOW_S
+        while rows < BATCH_MAX_ROWS:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_batch_queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            batch.append(item)
+            rows += len(item[2])
+        # Never mix estimators across a /reload
+        groups: Dict[int, list] = {}
+        for item in batch:
+            groups.setdefault(id(item[1]), []).append(item)
+        for items in groups.values():
+            await _run_batch(loop, items)
+
+@app.post("/predict", response_model=PredictResponse, response_model_exclude_none=True,
+          status_code=status.HTTP_200_OK,
+          openapi_extra={"requestBody": {
+              "required": True,
+              "description": "Loose envelope only. Each record is validated against the loaded "
+                             "model's input signature (one typed field per feature).",
+              "content": {"application/json": {"schema": PredictRequest.model_json_schema()}}}})
+async def predict(request: Request):
+    loop = asyncio.get_running_loop()
+    # Read the state once so a concurrent /reload can't mix two models' columns/adapter/dtype
+    state = STATE
+    if state is None and not _in_backoff():
+        state = await loop.run_in_executor(None, _get_model)
+    if state is None:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Model not loaded")
+    sk, columns = state.sk_model, state.feature_order
     try:
-        df = pd.DataFrame.from_records(req.records)
-        preds = MODEL.predict(df)
-        preds = [p.item() if hasattr(p, "item") else p for p in preds]
-        return PredictResponse(predictions=preds)
+        records = state.request_adapter.validate_json(await request.body())["records"]
+    except ValidationError as e:
+        raise RequestValidationError([{**err, "loc": ("body", *err["loc"])} for err in e.errors(include_url=False)])
+    try:
+        import numpy as np
+        if sk is not None:
+            arr = _to_array(records, columns, state.sk_dtype)
+            if _batch_queue is not None and len(arr):
+                fut = loop.create_future()
+                await _batch_queue.put((fut, sk, arr))
+                preds = await fut
+            else:
+                preds = await loop.run_in_executor(_predict_pool, sk.predict, arr)
+        else:
+            preds = await loop.run_in_executor(None, state.model.predict, _to_frame(records, columns, state.feature_types))
+        # tolist() converts in C; FastAPI serializes the response_model via pydantic-core
+        return PredictResponse(predictions=np.asarray(preds).tolist())
     except Exception as e:
         logger.exception("Prediction error")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 @app.post("/reload", status_code=status.HTTP_202_ACCEPTED)
 def reload_model():
-    global MODEL
-    MODEL = load_production_model()
+    global _last_load_failure
+    model = load_production_model()
+    with _model_lock:
+        _set_model(model)
+        _last_load_failure = None
     return {"status": "reloaded"}
+
+if __name__ == "__main__":
+    import importlib.util
+    import uvicorn
+    # One worker unless WEB_CONCURRENCY asks for more (e.g. WEB_CONCURRENCY=$(nproc) behind a CPU quota)
+    workers = max(1, int(os.environ.get("WEB_CONCURRENCY") or 1))
+    if workers > 1:
+        # Workers inherit this; each logs to stdout only instead of sharing logs/app.log
+        os.environ["LOG_TO_FILE"] = "0"
+        logger.info(f"Starting {workers} workers (cpu_limit={cpu_limit()}); file logging disabled in workers")
+    uvicorn.run(
+        "src.serve:app",
+        host="0.0.0.0",
+        port=int(os.environ.get("PORT", 8000)),
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+        workers=workers,
+        access_log=False,
+    )
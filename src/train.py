@@ -1,12 +1,13 @@
 from pathlib import Path
-import pandas as pd
-from joblib import dump
+from joblib import dump, parallel_backend
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import cross_val_score
 import mlflow
 import mlflow.sklearn
 from mlflow.models.signature import infer_signature
-from src.config import load_config
+from src.config import cpu_limit, load_config
+from src.csv_io import read_csv
 from src.logger import get_logger
 
 logger = get_logger("train")
@@ -19,7 +20,7 @@ def main():
     if not train_path.exists():
         raise FileNotFoundError("data/train.csv not found. Run prepare stage (dvc repro).")
 
-    df = pd.read_csv(train_path)
+    df = read_csv(train_path)
     X_train = df.drop(columns=["target"])
     y_train = df["target"]
 
@@ -31,27 +32,37 @@ def main():
         mlflow.log_param("max_depth", cfg.model.max_depth)
         mlflow.log_param("random_state", cfg.split.random_state)
 
+        # Forest fit uses sklearn's own thread pool; the loky backend below would move it to processes
         clf = RandomForestClassifier(
             n_estimators=cfg.model.n_estimators,
             max_depth=cfg.model.max_depth,
             random_state=cfg.split.random_state,
+            n_jobs=-1,
         ).fit(X_train, y_train)
 
-        acc_cv = cross_val_score(clf, X_train, y_train, cv=5, scoring="accuracy").mean()
+        # Parallelize over folds; single-threaded forests avoid nested oversubscription
+        clf_for_cv = clone(clf).set_params(n_jobs=1)
+        with parallel_backend("loky", n_jobs=cpu_limit()):
+            acc_cv = cross_val_score(clf_for_cv, X_train, y_train, cv=5, scoring="accuracy").mean()
+
+        # The API calls predict per request in every worker; don't ship an all-cores estimator
+        clf.set_params(n_jobs=1)
         mlflow.log_metric("cv_accuracy", float(acc_cv))
 
         # Save local artifact for evaluate stage
         model_path = Path("artifacts/model.joblib")
-        dump(clf, model_path)
+        dump(clf, model_path, compress=0, protocol=5)
 
         # Register candidate in Model Registry
-        signature = infer_signature(X_train, clf.predict(X_train))
+        # Signature only needs dtypes/shape; infer it from the input example
+        example = X_train.head(2)
+        signature = infer_signature(example, clf.predict(example))
         mlflow.sklearn.log_model(
             sk_model=clf,
             artifact_path="model",
             registered_model_name=cfg.mlflow.model_name,
             signature=signature,
-            input_example=X_train.head(2),
+            input_example=example,
         )
 
         logger.info(f"Model trained (CV accuracy={acc_cv:.4f}). "
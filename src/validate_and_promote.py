@@ -1,37 +1,71 @@
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import multiprocessing as mp
 import os
-import pandas as pd
+import warnings
 import numpy as np
-from typing import Tuple
+from typing import Any, List, Sequence, Tuple
 import requests
 import mlflow
 import mlflow.pyfunc
 from mlflow.tracking import MlflowClient
 from sklearn.metrics import accuracy_score, precision_recall_fscore_support, roc_auc_score
 from src.config import load_config
+from src.csv_io import pa_csv, read_csv
 from src.logger import get_logger
 
 logger = get_logger("validate_and_promote")
 
-def _load_test_df() -> Tuple[pd.DataFrame, pd.Series]:
+def _load_test_df() -> Tuple[Any, np.ndarray]:
+    # Features stay columnar (pyarrow Table, or DataFrame without pyarrow) so each column keeps its type
     p = Path("data/test.csv")
     if not p.exists():
         raise FileNotFoundError("data/test.csv not found. Run pipeline (dvc repro) first.")
-    df = pd.read_csv(p)
-    return df.drop(columns=["target"]), df["target"]
-
-def _score(model, X: pd.DataFrame, y: pd.Series) -> dict:
+    if pa_csv is None:
+        df = read_csv(p)
+        return df.drop(columns=["target"]), df["target"].to_numpy()
+    tbl = pa_csv.read_csv(str(p))
+    return tbl.drop(["target"]), tbl["target"].to_numpy()
+
+def _column_names(X) -> List[str]:
+    return list(X.column_names) if hasattr(X, "column_names") else list(X.columns)
+
+def _feature_matrix(X, names: Sequence[str]) -> np.ndarray:
+    # Columns are matched by name, never by file order; a mismatch must fail, not mis-score
+    cols = _column_names(X)
+    missing = [c for c in names if c not in cols]
+    extra = [c for c in cols if c not in names]
+    if missing or extra:
+        raise ValueError(f"test.csv columns do not match the model: missing={missing}, extra={extra}")
+    if hasattr(X, "column_names"):
+        return np.column_stack([X.column(c).to_numpy() for c in names])
+    return X[list(names)].to_numpy()
+
+def _score(model, X, y: np.ndarray) -> dict:
     if model is None:
         return {}
-    preds = model.predict(X)
-    y_pred = preds.argmax(axis=1) if hasattr(preds, "ndim") and preds.ndim > 1 else np.asarray(preds).reshape(-1)
-    probas = None
-    try:
-        sk = getattr(getattr(model, "_model_impl", None), "sklearn_model", None)
-        if sk is not None and hasattr(sk, "predict_proba"):
-            probas = sk.predict_proba(X)
-    except Exception:
-        pass
+    sk = getattr(getattr(model, "_model_impl", None), "sklearn_model", None)
+    with warnings.catch_warnings():
+        # _feature_matrix orders columns by sk.feature_names_in_ and checks names itself.
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        if sk is not None:
+            X_arr = _feature_matrix(X, list(getattr(sk, "feature_names_in_", _column_names(X))))
+            preds = sk.predict(X_arr)
+        else:
+            # pyfunc matches columns by name and enforces each column's own type
+            preds = model.predict(X.to_pandas() if hasattr(X, "to_pandas") else X)
+        if isinstance(preds, np.ndarray) and preds.ndim == 1:
+            y_pred = preds
+        elif hasattr(preds, "ndim") and preds.ndim > 1:
+            y_pred = preds.argmax(axis=1)
+        else:
+            y_pred = np.asarray(preds).reshape(-1)
+        probas = None
+        try:
+            if sk is not None and hasattr(sk, "predict_proba"):
+                probas = sk.predict_proba(X_arr)
+        except Exception:
+            pass
     acc = accuracy_score(y, y_pred)
     precision, recall, f1, _ = precision_recall_fscore_support(y, y_pred, average="macro")
     m = {"accuracy": float(acc), "precision_macro": float(precision), "recall_macro": float(recall), "f1_macro": float(f1)}
@@ -43,6 +77,15 @@ def _score(model, X: pd.DataFrame, y: pd.Series) -> dict:
             pass
     return m
 
+def _load_and_score(tracking_uri: str, uri: str, X, y: np.ndarray) -> dict:
+    mlflow.set_tracking_uri(tracking_uri)
+    return _score(mlflow.pyfunc.load_model(uri), X, y)
+
+def _mp_context():
+    # forkserver children start clean instead of inheriting this process' MLflow client state
+    methods = mp.get_all_start_methods()
+    return mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+
 def main():
     cfg = load_config()
     mlflow.set_tracking_uri(cfg.mlflow.tracking_uri)
@@ -61,16 +104,19 @@ def main():
     cand = max(versions, key=lambda v: int(v.version))
 
     # Current champion via alias (preferred). Fallback to stage if alias unavailable.
-    champ = None
-    try:
-        champ = client.get_model_version_by_alias(name=model_name, alias=alias)
-    except Exception:
-        # fallback for older servers
-        prods = [v for v in versions if v.current_stage == "Production"]
-        champ = max(prods, key=lambda v: int(v.version)) if prods else None
+    # Newer servers return aliases with search results, which saves the alias lookup RPC.
+    champ = next((v for v in versions if alias in (getattr(v, "aliases", None) or [])), None)
+    if champ is None:
+        try:
+            champ = client.get_model_version_by_alias(name=model_name, alias=alias)
+        except Exception:
+            # fallback for older servers
+            prods = [v for v in versions if v.current_stage == "Production"]
+            champ = max(prods, key=lambda v: int(v.version)) if prods else None
 
+    # Pin both URIs to versions so loading does not re-resolve the alias
     cand_uri = f"models:/{model_name}/{cand.version}"
-    champ_uri = f"models:/{model_name}@{alias}" if champ else None
+    champ_uri = f"models:/{model_name}/{champ.version}" if champ else None
 
     logger.info(f"Candidate: {model_name} v{cand.version} (current_stage={cand.current_stage})")
     if champ:
@@ -78,11 +124,17 @@ def main():
     else:
         logger.info(f"No current champion for alias '{alias}'.")
 
-    cand_model = mlflow.pyfunc.load_model(cand_uri)
-    champ_model = mlflow.pyfunc.load_model(champ_uri) if champ_uri else None
-
-    cand_m = _score(cand_model, X, y)
-    champ_m = _score(champ_model, X, y) if champ_model else None
+    # Load + score candidate and champion concurrently in separate processes
+    jobs = {"candidate": cand_uri}
+    if champ_uri:
+        jobs["champion"] = champ_uri
+    with ProcessPoolExecutor(max_workers=len(jobs), mp_context=_mp_context()) as pool:
+        futures = {pool.submit(_load_and_score, cfg.mlflow.tracking_uri, uri, X, y): role
+                   for role, uri in jobs.items()}
+        results = {futures[f]: f.result() for f in as_completed(futures)}
+
+    cand_m = results["candidate"]
+    champ_m = results.get("champion")
 
     logger.info(f"Candidate metrics: {cand_m}")
     if champ_m: